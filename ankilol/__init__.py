@@ -1,3 +1,21 @@
+import json
 import os
+import tempfile
 from pathlib import Path
 base_dir = Path(os.path.abspath(os.path.dirname(__file__)))
+
+
+def write_json_atomic(filename: str | Path, data):
+    """
+    Write JSON to a temporary file beside `filename` and swap it into place, so an interrupted run never leaves a
+    truncated file behind.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as file:
+        try:
+            json.dump(data, file)
+        except BaseException:
+            file.close()
+            os.remove(file.name)
+            raise
+    os.replace(file.name, filename)
@@ -1,13 +1,45 @@
+import argparse
 import configparser
 import logging
 import os.path
 import sys
+from typing import Iterable
 from .parser import HTMLParser, TextParser, get_parser_class
-from .writer import HTMLWriter, TextWriter, get_writer_class
+from .writer import ApkgWriter, HTMLWriter, TextWriter, get_writer_class
 from .anki import AnkiConnect
 from .fetcher import GoogleDriveTransferManager, LocalTransferManager
+from .similarity import QuestionIndex
+from .stream import dump_entries, load_entries
+from .definitions import Entry
 from . import base_dir
 
+STAGES = ['run', 'parse', 'push', 'write']
+NEAR_DUPLICATE_TAG = 'near-duplicate'
+
+
+def push_entries(
+        anki_connect: AnkiConnect,
+        entries: Iterable[Entry],
+        question_index: QuestionIndex,
+        deck: str = 'Web Development',
+):
+    try:
+        for entry in entries:
+            if entry.answer is None:
+                continue
+            duplicates = question_index.find_duplicates(entry.question)
+            if len(duplicates) > 0:
+                # Similar wording can still be a different question, so flag it for review in Anki instead of
+                # dropping it
+                logging.warning(f'Tagging note {entry.question} as a near-duplicate of {duplicates[0]}')
+                entry = entry._replace(tags=entry.tags + [NEAR_DUPLICATE_TAG])
+            # Anki rejected the note if we got no id back, and indexing it would skip it on every later run
+            if anki_connect.add_note(entry, deck=deck) is not None:
+                question_index.add(entry.question)
+    finally:
+        # Save whatever was pushed, so a restarted push doesn't add the same notes again
+        question_index.save()
+
 
 def main(filename: str | None):
     logging.basicConfig(level=logging.INFO)
@@ -40,9 +72,7 @@ def main(filename: str | None):
     parser = Parser(filename=temporary_filename)
     answered_entries, unanswered_entries = parser.extract_entries()
 
-    if len(answered_entries) > 0:
-        for entry in answered_entries:
-            anki_connect.add_note(entry)
+    push_entries(anki_connect, answered_entries, QuestionIndex.for_deck('Web Development'))
     anki_connect.sync()
 
     unanswered_filename = filename_base + '.unanswered' + extension
@@ -57,12 +87,77 @@ def main(filename: str | None):
     transfer_manager.upload_file(filename=unanswered_filename, file_id=doc_id)
 
 
-# Press the green button in the gutter to run the script.
-if __name__ == '__main__':
-    if len(sys.argv) > 2:
-        filename = sys.argv[1]
+def parse_stage(args: argparse.Namespace):
+    Parser = get_parser_class(args.filename)
+    parser = Parser(filename=args.filename)
+    answered_entries, unanswered_entries = parser.extract_entries()
+    dump_entries(answered_entries + unanswered_entries, sys.stdout)
+
+
+def push_stage(args: argparse.Namespace):
+    anki_connect = AnkiConnect()
+    if not anki_connect.is_running():
+        logging.error('Cannot connect to Anki server. Have you tried starting it?')
+        sys.exit(1)
+    push_entries(anki_connect, load_entries(args.input), QuestionIndex.for_deck(args.deck), deck=args.deck)
+    anki_connect.sync()
+
+
+def write_stage(args: argparse.Namespace):
+    entries = load_entries(args.input)
+    if args.answered:
+        entries = (entry for entry in entries if entry.answer is not None)
+    elif args.unanswered:
+        entries = (entry for entry in entries if entry.answer is None)
+    Writer = get_writer_class(args.filename)
+    if Writer is ApkgWriter:
+        writer = Writer(filename=args.filename, deck=args.deck)
     else:
-        filename = None
-    main(filename=filename)
+        writer = Writer(filename=args.filename)
+    writer.write(list(entries))
+
 
-# See PyCharm help at https://www.jetbrains.com/help/pycharm/
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='ankilol')
+    subparsers = parser.add_subparsers(dest='stage')
+
+    run_parser = subparsers.add_parser('run', help='Download, parse, push, write and upload in one go')
+    run_parser.add_argument('filename', nargs='?', default=None)
+    run_parser.set_defaults(func=lambda args: main(filename=args.filename))
+
+    parse_help = 'Parse a document into JSON Lines entries on stdout, answered entries first and then unanswered ones'
+    parse_parser = subparsers.add_parser('parse', help=parse_help, description=parse_help)
+    parse_parser.add_argument('filename')
+    parse_parser.set_defaults(func=parse_stage)
+
+    push_parser = subparsers.add_parser('push', help='Add answered JSON Lines entries to Anki and sync')
+    push_parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin)
+    push_parser.add_argument('--deck', default='Web Development')
+    push_parser.set_defaults(func=push_stage)
+
+    write_parser = subparsers.add_parser('write', help='Write JSON Lines entries to a .txt, .html or .apkg file')
+    write_parser.add_argument('filename')
+    write_parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin)
+    write_parser.add_argument('--deck', default='Web Development', help='Deck to export to when writing an .apkg file')
+    only = write_parser.add_mutually_exclusive_group()
+    only.add_argument('--answered', action='store_true', help='Only write answered entries')
+    only.add_argument('--unanswered', action='store_true', help='Only write unanswered entries')
+    write_parser.set_defaults(func=write_stage)
+
+    return parser
+
+
+def cli(argv: list[str] | None = None):
+    if argv is None:
+        argv = sys.argv[1:]
+    # Without a stage, behave like before and run the whole pipeline, optionally on a local file
+    if len(argv) == 0 or argv[0] not in STAGES and not argv[0].startswith('-'):
+        argv = ['run'] + argv
+
+    logging.basicConfig(level=logging.INFO)
+    args = build_argument_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+
+from ankilol.definitions import Entry
+
+APKG_COLLECTION_NAME = 'collection.anki2'
+APKG_MEDIA_NAME = 'media'
+FIELD_SEPARATOR = '\x1f'
+MODEL_NAME = 'Basic (ankilol)'
+BASE91_TABLE = (
+    'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    '!#$%&()*+,-./:;<=>?@[]^_`{|}~'
+)
+
+# Anki's schema version 11, the format understood by every importer since Anki 2.1
+SCHEMA = '''
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null,
+    tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn on notes (usn);
+CREATE INDEX ix_cards_usn on cards (usn);
+CREATE INDEX ix_revlog_usn on revlog (usn);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_cards_sched on cards (did, queue, due);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+CREATE INDEX ix_notes_csum on notes (csum);
+'''
+
+
+def stable_id(name: str) -> int:
+    """
+    Derive a positive 63-bit id from a name, so re-exports reuse the same deck and model ids.
+    """
+    digest = hashlib.sha256(name.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') >> 1
+
+
+def note_guid(entry: Entry, deck_name: str) -> str:
+    """
+    Base91-encode a hash of the deck and question, in the same alphabet Anki uses for its own guids. Keying on these
+    and not the answer means that editing an answer and re-importing updates the existing note rather than
+    duplicating it, while the same question exported to another deck becomes a note of its own.
+    """
+    key = deck_name + FIELD_SEPARATOR + entry.question
+    value = int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big')
+    guid = ''
+    while value:
+        value, remainder = divmod(value, len(BASE91_TABLE))
+        guid = BASE91_TABLE[remainder] + guid
+    return guid
+
+
+def referenced_media(entries: list[Entry]) -> list[str]:
+    """
+    Return the image filenames referenced by entries, in the order they first appear. Anki keeps media in one flat
+    folder, so sources with a directory or URL in them can't be packaged as-is and are left out.
+    """
+    filenames = []
+    for entry in entries:
+        for field in [entry.question, entry.answer]:
+            for source in re.findall(r'<img[^>]*\ssrc=["\']([^"\']+)["\']', field or ''):
+                if os.path.basename(source) == source and source not in filenames:
+                    filenames.append(source)
+    return filenames
+
+
+def sort_field(text: str) -> str:
+    return re.sub(r'<[^>]*>', '', text).strip()
+
+
+def field_checksum(text: str) -> int:
+    return int(hashlib.sha1(sort_field(text).encode('utf-8')).hexdigest()[:8], 16)
+
+
+def format_tags(tags: list[str]) -> str:
+    if not tags:
+        return ''
+    return ' ' + ' '.join(tags) + ' '
+
+
+def basic_model(model_id: int, deck_id: int, timestamp: int) -> dict:
+    field_defaults = {'sticky': False, 'rtl': False, 'font': 'Arial', 'size': 20, 'media': []}
+    return {
+        'id': model_id,
+        'name': MODEL_NAME,
+        'type': 0,
+        'mod': timestamp,
+        'usn': -1,
+        'sortf': 0,
+        'did': deck_id,
+        'tmpls': [{
+            'name': 'Card 1',
+            'ord': 0,
+            'qfmt': '{{Front}}',
+            'afmt': '{{FrontSide}}\n\n<hr id=answer>\n\n{{Back}}',
+            'did': None,
+            'bqfmt': '',
+            'bafmt': '',
+        }],
+        'flds': [
+            {'name': 'Front', 'ord': 0, **field_defaults},
+            {'name': 'Back', 'ord': 1, **field_defaults},
+        ],
+        'css': '.card {\n font-family: arial;\n font-size: 20px;\n text-align: center;\n color: black;\n'
+               ' background-color: white;\n}\n',
+        'latexPre': '\\documentclass[12pt]{article}\n\\special{papersize=3in,5in}\n\\usepackage[utf8]{inputenc}\n'
+                    '\\usepackage{amssymb,amsmath}\n\\pagestyle{empty}\n\\setlength{\\parindent}{0in}\n'
+                    '\\begin{document}\n',
+        'latexPost': '\\end{document}',
+        'tags': [],
+        'vers': [],
+        'req': [[0, 'all', [0]]],
+    }
+
+
+def deck(deck_id: int, name: str, timestamp: int) -> dict:
+    return {
+        'id': deck_id,
+        'name': name,
+        'desc': '',
+        'mod': timestamp,
+        'usn': -1,
+        'collapsed': False,
+        'browserCollapsed': False,
+        'newToday': [0, 0],
+        'revToday': [0, 0],
+        'lrnToday': [0, 0],
+        'timeToday': [0, 0],
+        'dyn': 0,
+        'conf': 1,
+        'extendNew': 10,
+        'extendRev': 50,
+    }
+
+
+def deck_config(timestamp: int) -> dict:
+    return {
+        'id': 1,
+        'name': 'Default',
+        'mod': timestamp,
+        'usn': -1,
+        'maxTaken': 60,
+        'autoplay': True,
+        'timer': 0,
+        'replayq': True,
+        'dyn': False,
+        'new': {
+            'delays': [1, 10], 'ints': [1, 4, 7], 'initialFactor': 2500, 'order': 1, 'perDay': 20,
+            'bury': True, 'separate': True,
+        },
+        'rev': {
+            'perDay': 100, 'ease4': 1.3, 'fuzz': 0.05, 'maxIvl': 36500, 'ivlFct': 1, 'bury': True,
+            'minSpace': 1,
+        },
+        'lapse': {'delays': [10], 'mult': 0, 'minInt': 1, 'leechFails': 8, 'leechAction': 0},
+    }
+
+
+def create_collection(connection: sqlite3.Connection, deck_name: str, timestamp: int) -> tuple[int, int]:
+    """
+    Create an empty collection holding a single deck and a single Basic note type, returning their ids.
+    """
+    deck_id = stable_id('deck:' + deck_name)
+    # One note type shared by every deck, so a note type change never stops Anki updating a re-imported note
+    model_id = stable_id('model:' + MODEL_NAME)
+    models = {str(model_id): basic_model(model_id, deck_id, timestamp)}
+    decks = {
+        '1': deck(1, 'Default', timestamp),
+        str(deck_id): deck(deck_id, deck_name, timestamp),
+    }
+    conf = {
+        'activeDecks': [1], 'curDeck': 1, 'newSpread': 0, 'collapseTime': 1200, 'timeLim': 0,
+        'estTimes': True, 'dueCounts': True, 'curModel': str(model_id), 'nextPos': 1, 'sortType': 'noteFld',
+        'sortBackwards': False, 'addToCur': True,
+    }
+    connection.executescript(SCHEMA)
+    connection.execute(
+        'INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, ?)',
+        (
+            timestamp // 1000, timestamp, timestamp, json.dumps(conf), json.dumps(models), json.dumps(decks),
+            json.dumps({'1': deck_config(timestamp)}), json.dumps({}),
+        ),
+    )
+    return deck_id, model_id
+
+
+def insert_entries(
+        connection: sqlite3.Connection,
+        entries: list[Entry],
+        deck_name: str,
+        deck_id: int,
+        model_id: int,
+        timestamp: int,
+):
+    """
+    Bulk insert one note and one new card per entry. Ids count up from the current time in milliseconds, the same
+    way Anki allocates them. Entries repeating a question share a guid, so only the last of them is kept.
+    """
+    unique_entries = {}
+    for entry in entries:
+        unique_entries[note_guid(entry, deck_name)] = entry
+
+    notes = []
+    cards = []
+    modified = timestamp // 1000
+    for position, (guid, entry) in enumerate(unique_entries.items()):
+        row_id = timestamp + position
+        notes.append((
+            row_id, guid, model_id, modified, -1, format_tags(entry.tags),
+            entry.question + FIELD_SEPARATOR + entry.answer, sort_field(entry.question),
+            field_checksum(entry.question), 0, '',
+        ))
+        cards.append((row_id, row_id, deck_id, 0, modified, -1, 0, 0, position + 1, 0, 0, 0, 0, 0, 0, 0, 0, ''))
+    connection.executemany('INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', notes)
+    connection.executemany(
+        'INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', cards
+    )
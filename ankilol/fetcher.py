@@ -1,23 +1,55 @@
 # TODO: this should be able to read both local files and files sourced from google drive.
 from abc import ABC, abstractmethod
 from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import shutil
 
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
 from google.oauth2.service_account import Credentials
 import io
-from ankilol import base_dir
+from ankilol import base_dir, write_json_atomic
 import configparser
 
 
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(filename: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 class TransferManager(ABC):
 
     @abstractmethod
     def download_file(self, filename: str | Path):
         pass
 
+    def upload_file(self, filename: str | Path, file_id: str | Path) -> bool:
+        """
+        Upload a file, unless the destination already holds exactly this content. Returns whether an upload happened.
+        """
+        new_hash = content_hash(filename)
+        if self._is_unchanged(new_hash, file_id):
+            logging.info(f'Skipping upload of {filename}, destination is already up to date')
+            return False
+
+        self._upload(filename, file_id, new_hash)
+        return True
+
     @abstractmethod
-    def upload_file(self, filename: str | Path, file_id: str | Path):
+    def _is_unchanged(self, new_hash: str, file_id: str | Path) -> bool:
+        pass
+
+    @abstractmethod
+    def _upload(self, filename: str | Path, file_id: str | Path, new_hash: str):
         pass
 
 
@@ -26,19 +58,29 @@ class LocalTransferManager(TransferManager):
         with open(self.filename, 'r') as file:
             return file.read()
 
-    def upload_file(self, filename, file_id):
-        with open(filename, 'r') as read_file:
-            with open(file_id, 'w') as write_file:
-                write_file.write(read_file.read())
+    def _is_unchanged(self, new_hash, file_id):
+        return os.path.exists(file_id) and content_hash(file_id) == new_hash
+
+    def _upload(self, filename, file_id, new_hash):
+        shutil.copyfile(filename, file_id)
 
 
 class GoogleDriveTransferManager(TransferManager):
     SERVICE_ACCOUNT_FILE = base_dir / 'service_account.json'
+    RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    NUM_RETRIES = 5
+    UPLOAD_HASHES_FILE = base_dir / 'upload_hashes.json'
+
+    def __init__(self, upload_hashes_file: str | Path | None = None):
+        self.upload_hashes_file = upload_hashes_file or self.UPLOAD_HASHES_FILE
+        self._drive_service = None
 
     def _initialize_service(self):
-        creds = Credentials.from_service_account_file(self.SERVICE_ACCOUNT_FILE)
-        drive_service = build('drive', 'v3', credentials=creds)
-        return drive_service
+        if self._drive_service is None:
+            creds = Credentials.from_service_account_file(self.SERVICE_ACCOUNT_FILE)
+            self._drive_service = build('drive', 'v3', credentials=creds)
+        return self._drive_service
 
     def download_file(self, file_id: str):
         drive_service = self._initialize_service()
@@ -53,13 +95,44 @@ class GoogleDriveTransferManager(TransferManager):
 
         return fh.getvalue()
 
-    def upload_file(self, filename: str | Path, file_id: str):
+    def _is_unchanged(self, new_hash: str, file_id: str) -> bool:
+        last_upload = self._load_upload_hashes().get(file_id)
+        if last_upload is None or last_upload['hash'] != new_hash:
+            return False
+
+        # The doc may have been edited since our last upload, in which case it needs overwriting even though the
+        # content we're uploading is the same
         drive_service = self._initialize_service()
+        request = drive_service.files().get(fileId=file_id, fields='version')
+        return request.execute(num_retries=self.NUM_RETRIES)['version'] == last_upload['version']
 
-        # Specify the file type as HTML and the conversion to Google Docs format
-        media = MediaFileUpload(filename, mimetype='text/html')
-        request = drive_service.files().update(fileId=file_id, media_body=media)
+    def _upload(self, filename: str | Path, file_id: str, new_hash: str):
+        drive_service = self._initialize_service()
 
-        # Execute the request
-        updated_file = request.execute()
+        # Large files go up in resumable chunks, so a dropped connection only costs the current chunk
+        resumable = os.path.getsize(filename) > self.RESUMABLE_THRESHOLD
+        # Specify the file type as HTML and the conversion to Google Docs format
+        media = MediaFileUpload(
+            filename, mimetype='text/html', chunksize=self.UPLOAD_CHUNK_SIZE, resumable=resumable
+        )
+        request = drive_service.files().update(fileId=file_id, media_body=media, fields='version')
+
+        if resumable:
+            response = None
+            while response is None:
+                status, response = request.next_chunk(num_retries=self.NUM_RETRIES)
+                if status is not None:
+                    print(f"Upload {int(status.progress() * 100)}%.")
+        else:
+            response = request.execute(num_retries=self.NUM_RETRIES)
+
+        upload_hashes = self._load_upload_hashes()
+        upload_hashes[file_id] = {'hash': new_hash, 'version': response['version']}
+        write_json_atomic(self.upload_hashes_file, upload_hashes)
+
+    def _load_upload_hashes(self) -> dict[str, dict[str, str]]:
+        if not os.path.exists(self.upload_hashes_file):
+            return {}
+        with open(self.upload_hashes_file, 'r') as file:
+            return json.load(file)
 
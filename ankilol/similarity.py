@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import random
+import re
+from pathlib import Path
+
+from ankilol import base_dir, write_json_atomic
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_question(question: str) -> str:
+    text = re.sub(r'<[^>]*>', ' ', question)
+    return ' '.join(text.lower().split())
+
+
+def shingles(text: str, size: int) -> set[int]:
+    """
+    Hash every run of `size` characters to a stable 64-bit integer. Python's builtin hash is salted per process,
+    so it can't be used for signatures that are persisted between runs.
+    """
+    if len(text) <= size:
+        windows = [text]
+    else:
+        windows = [text[i:i + size] for i in range(len(text) - size + 1)]
+    return {int.from_bytes(hashlib.blake2b(w.encode('utf-8'), digest_size=8).digest(), 'big') for w in windows}
+
+
+def deck_index_file(deck: str) -> Path:
+    """
+    Each deck keeps its own index, so pushing the same questions to a second deck isn't skipped.
+    """
+    slug = re.sub(r'\W+', '_', deck.lower()).strip('_')
+    digest = hashlib.sha1(deck.encode('utf-8')).hexdigest()[:8]
+    return base_dir / f'question_index.{slug}.{digest}.json'
+
+
+class QuestionIndex:
+    """
+    Finds previously seen questions that are worded slightly differently, using MinHash signatures over character
+    shingles. Signatures are split into bands and each band is hashed into a bucket, so a lookup only compares
+    against questions sharing at least one bucket rather than the whole corpus.
+    """
+    def __init__(
+            self,
+            filename: str | Path,
+            num_permutations: int = 64,
+            bands: int = 16,
+            shingle_size: int = 5,
+            threshold: float = 0.8,
+            seed: int = 1,
+    ):
+        if num_permutations % bands != 0:
+            raise ValueError('num_permutations must be divisible by bands')
+        self.filename = filename
+        self.num_permutations = num_permutations
+        self.bands = bands
+        self.rows = num_permutations // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.seed = seed
+
+        generator = random.Random(seed)
+        self._permutations = [
+            (generator.randrange(1, MERSENNE_PRIME), generator.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_permutations)
+        ]
+        self.questions = []
+        self.signatures = []
+        self._buckets = [{} for _ in range(bands)]
+
+    def signature(self, question: str) -> list[int]:
+        hashes = shingles(normalize_question(question), self.shingle_size)
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self._permutations]
+
+    def find_duplicates(self, question: str) -> list[str]:
+        """
+        Return indexed questions whose estimated Jaccard similarity to `question` is at least the threshold.
+        """
+        signature = self.signature(question)
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, []))
+
+        duplicates = []
+        for candidate in sorted(candidates):
+            if self.similarity(signature, self.signatures[candidate]) >= self.threshold:
+                duplicates.append(self.questions[candidate])
+        return duplicates
+
+    def add(self, question: str):
+        self._insert(question, self.signature(question))
+
+    def similarity(self, first: list[int], second: list[int]) -> float:
+        return sum(a == b for a, b in zip(first, second)) / self.num_permutations
+
+    def save(self):
+        write_json_atomic(self.filename, {
+            'num_permutations': self.num_permutations,
+            'bands': self.bands,
+            'shingle_size': self.shingle_size,
+            'seed': self.seed,
+            'questions': self.questions,
+            'signatures': self.signatures,
+        })
+
+    @classmethod
+    def load(cls, filename: str | Path, threshold: float = 0.8) -> 'QuestionIndex':
+        """
+        Load a saved index, or start an empty one if nothing has been saved yet.
+        """
+        if not os.path.exists(filename):
+            return cls(filename=filename, threshold=threshold)
+
+        with open(filename, 'r') as file:
+            data = json.load(file)
+        index = cls(
+            filename=filename,
+            num_permutations=data['num_permutations'],
+            bands=data['bands'],
+            shingle_size=data['shingle_size'],
+            threshold=threshold,
+            seed=data['seed'],
+        )
+        for question, signature in zip(data['questions'], data['signatures']):
+            index._insert(question, signature)
+        return index
+
+    @classmethod
+    def for_deck(cls, deck: str, threshold: float = 0.8) -> 'QuestionIndex':
+        return cls.load(deck_index_file(deck), threshold=threshold)
+
+    def _insert(self, question: str, signature: list[int]):
+        position = len(self.questions)
+        self.questions.append(question)
+        self.signatures.append(signature)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(position)
+
+    def _band_keys(self, signature: list[int]) -> list[tuple[int, ...]]:
+        return [tuple(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def __len__(self):
+        return len(self.questions)
@@ -0,0 +1,21 @@
+import json
+from typing import Iterable, Iterator, TextIO
+
+from ankilol.definitions import Entry
+
+
+def dump_entries(entries: Iterable[Entry], file: TextIO):
+    """
+    Write entries as JSON Lines, one entry per line.
+    """
+    for entry in entries:
+        file.write(json.dumps(entry._asdict(), ensure_ascii=False) + '\n')
+    file.flush()
+
+
+def load_entries(file: TextIO) -> Iterator[Entry]:
+    for line in file:
+        if line.strip() == '':
+            continue
+        record = json.loads(line)
+        yield Entry(question=record['question'], answer=record.get('answer'), tags=record.get('tags', []))
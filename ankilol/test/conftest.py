@@ -0,0 +1,8 @@
+import pytest
+
+from ..similarity import QuestionIndex
+
+
+@pytest.fixture
+def question_index(tmp_path) -> QuestionIndex:
+    yield QuestionIndex(filename=tmp_path / 'question_index.json')
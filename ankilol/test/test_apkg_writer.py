@@ -0,0 +1,114 @@
+import sqlite3
+import zipfile
+import json
+
+from writer import ApkgWriter
+from definitions import Entry
+
+
+def read_notes(package_filename, tmp_path):
+    with zipfile.ZipFile(package_filename) as package:
+        package.extract('collection.anki2', tmp_path)
+        media = json.loads(package.read('media'))
+    connection = sqlite3.connect(tmp_path / 'collection.anki2')
+    notes = connection.execute('SELECT guid, flds, tags FROM notes').fetchall()
+    card_count = connection.execute('SELECT count(*) FROM cards').fetchone()[0]
+    connection.close()
+    return notes, card_count, media
+
+
+def test_write_answered_entries(tmp_path):
+    file_to_write = tmp_path / "test.apkg"
+    writer = ApkgWriter(file_to_write)
+    entries = [
+        Entry(question='test question', answer='test answer', tags=['#book']),
+        Entry(question='unanswered question', answer=None, tags=[]),
+    ]
+    writer.write(entries)
+    notes, card_count, media = read_notes(file_to_write, tmp_path)
+
+    assert len(notes) == 1
+    assert card_count == 1
+    assert notes[0][1] == 'test question\x1ftest answer'
+    assert notes[0][2] == ' #book '
+    assert media == {}
+
+
+def test_guid_stable_across_writes(tmp_path):
+    first_file = tmp_path / "first.apkg"
+    second_file = tmp_path / "second.apkg"
+    ApkgWriter(first_file).write([Entry(question='test question', answer='old answer', tags=[])])
+    ApkgWriter(second_file).write([Entry(question='test question', answer='new answer', tags=[])])
+
+    first_notes, _, _ = read_notes(first_file, tmp_path / 'first')
+    second_notes, _, _ = read_notes(second_file, tmp_path / 'second')
+    assert first_notes[0][0] == second_notes[0][0]
+
+
+def test_write_media(tmp_path):
+    image = tmp_path / "image.png"
+    image.write_bytes(b'not really a png')
+    file_to_write = tmp_path / "test.apkg"
+    writer = ApkgWriter(file_to_write, media_files=[image])
+    writer.write([Entry(question='<img src="image.png">', answer='test answer', tags=[])])
+
+    _, _, media = read_notes(file_to_write, tmp_path)
+    assert media == {'0': 'image.png'}
+    with zipfile.ZipFile(file_to_write) as package:
+        assert package.read('0') == b'not really a png'
+
+
+def test_repeated_question_keeps_last_answer(tmp_path):
+    file_to_write = tmp_path / "test.apkg"
+    writer = ApkgWriter(file_to_write)
+    writer.write([
+        Entry(question='test question', answer='old answer', tags=[]),
+        Entry(question='test question', answer='new answer', tags=[]),
+    ])
+    notes, card_count, _ = read_notes(file_to_write, tmp_path)
+
+    assert len(notes) == 1
+    assert card_count == 1
+    assert notes[0][1] == 'test question\x1fnew answer'
+
+
+def test_model_shared_across_decks(tmp_path):
+    first_file = tmp_path / "first.apkg"
+    second_file = tmp_path / "second.apkg"
+    entry = Entry(question='test question', answer='test answer', tags=[])
+    ApkgWriter(first_file, deck='First').write([entry])
+    ApkgWriter(second_file, deck='Second').write([entry])
+
+    model_ids = []
+    for package_filename, directory in [(first_file, tmp_path / 'first'), (second_file, tmp_path / 'second')]:
+        with zipfile.ZipFile(package_filename) as package:
+            package.extract('collection.anki2', directory)
+        connection = sqlite3.connect(directory / 'collection.anki2')
+        model_ids.append(connection.execute('SELECT mid FROM notes').fetchone()[0])
+        connection.close()
+    assert model_ids[0] == model_ids[1]
+
+
+def test_guid_differs_across_decks(tmp_path):
+    first_file = tmp_path / "first.apkg"
+    second_file = tmp_path / "second.apkg"
+    entry = Entry(question='test question', answer='test answer', tags=[])
+    ApkgWriter(first_file, deck='Web Development').write([entry])
+    ApkgWriter(second_file, deck='Other').write([entry])
+
+    first_notes, _, _ = read_notes(first_file, tmp_path / 'first')
+    second_notes, _, _ = read_notes(second_file, tmp_path / 'second')
+    assert first_notes[0][0] != second_notes[0][0]
+
+
+def test_write_referenced_media(tmp_path):
+    (tmp_path / "image.png").write_bytes(b'not really a png')
+    file_to_write = tmp_path / "test.apkg"
+    writer = ApkgWriter(file_to_write, media_dir=tmp_path)
+    writer.write([
+        Entry(question='<img src="image.png">', answer='<img src="https://example.com/remote.png">', tags=[]),
+        Entry(question='missing image', answer='<img src="missing.png">', tags=[]),
+    ])
+
+    _, _, media = read_notes(file_to_write, tmp_path)
+    assert media == {'0': 'image.png'}
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from fetcher import GoogleDriveTransferManager
+
+
+class FakeStatus:
+    def __init__(self, progress):
+        self._progress = progress
+
+    def progress(self):
+        return self._progress
+
+
+class FakeRequest:
+    def __init__(self, response, chunks=0):
+        self.response = response
+        self.chunks = chunks
+        self.chunk_calls = 0
+
+    def execute(self, num_retries=0):
+        return self.response
+
+    def next_chunk(self, num_retries=0):
+        self.chunk_calls += 1
+        if self.chunk_calls <= self.chunks:
+            return FakeStatus(self.chunk_calls / (self.chunks + 1)), None
+        return None, self.response
+
+
+class FakeFiles:
+    def __init__(self):
+        self.version = 1
+        self.uploads = 0
+        self.requests = []
+
+    def get(self, fileId, fields):
+        return FakeRequest({'version': str(self.version)})
+
+    def update(self, fileId, media_body, fields):
+        self.uploads += 1
+        self.version += 1
+        request = FakeRequest({'version': str(self.version)}, chunks=2)
+        self.requests.append(request)
+        return request
+
+
+class FakeDriveService:
+    def __init__(self):
+        self.fake_files = FakeFiles()
+
+    def files(self):
+        return self.fake_files
+
+
+@pytest.fixture
+def transfer_manager(tmp_path) -> GoogleDriveTransferManager:
+    transfer_manager = GoogleDriveTransferManager(upload_hashes_file=tmp_path / 'upload_hashes.json')
+    transfer_manager._drive_service = FakeDriveService()
+    yield transfer_manager
+
+
+def test_upload_skipped_when_unchanged(transfer_manager, tmp_path):
+    source = tmp_path / "source.html"
+    source.write_text('<p>test question</p>')
+
+    assert transfer_manager.upload_file(filename=source, file_id='doc')
+    assert not transfer_manager.upload_file(filename=source, file_id='doc')
+    assert transfer_manager._drive_service.fake_files.uploads == 1
+
+
+def test_upload_repeated_when_doc_edited(transfer_manager, tmp_path):
+    source = tmp_path / "source.html"
+    source.write_text('<p>test question</p>')
+
+    transfer_manager.upload_file(filename=source, file_id='doc')
+    # Someone edits the doc in Drive, bumping its version
+    transfer_manager._drive_service.fake_files.version += 1
+    assert transfer_manager.upload_file(filename=source, file_id='doc')
+    assert transfer_manager._drive_service.fake_files.uploads == 2
+
+
+def test_resumable_upload_records_version(transfer_manager, tmp_path):
+    source = tmp_path / "source.html"
+    source.write_text('<p>test question</p>')
+    transfer_manager.RESUMABLE_THRESHOLD = 0
+
+    assert transfer_manager.upload_file(filename=source, file_id='doc')
+    request = transfer_manager._drive_service.fake_files.requests[0]
+    assert request.chunk_calls == 3
+    with open(tmp_path / 'upload_hashes.json', 'r') as file:
+        assert json.load(file)['doc']['version'] == '2'
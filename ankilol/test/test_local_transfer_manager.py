@@ -0,0 +1,49 @@
+from fetcher import LocalTransferManager
+
+
+def test_upload_copies_file(tmp_path):
+    source = tmp_path / "source.txt"
+    destination = tmp_path / "destination.txt"
+    source.write_text('test question\n')
+    transfer_manager = LocalTransferManager()
+
+    assert transfer_manager.upload_file(filename=source, file_id=destination)
+    assert destination.read_text() == 'test question\n'
+
+
+def test_upload_skipped_when_unchanged(tmp_path):
+    source = tmp_path / "source.txt"
+    destination = tmp_path / "destination.txt"
+    source.write_text('test question\n')
+    transfer_manager = LocalTransferManager()
+
+    assert transfer_manager.upload_file(filename=source, file_id=destination)
+    assert not transfer_manager.upload_file(filename=source, file_id=destination)
+
+    source.write_text('another question\n')
+    assert transfer_manager.upload_file(filename=source, file_id=destination)
+    assert destination.read_text() == 'another question\n'
+
+
+def test_upload_repeated_when_destination_edited(tmp_path):
+    source = tmp_path / "source.txt"
+    destination = tmp_path / "destination.txt"
+    source.write_text('Q2\n')
+    transfer_manager = LocalTransferManager()
+
+    transfer_manager.upload_file(filename=source, file_id=destination)
+    destination.write_text('Q2\nQ3\n* A3\n')
+    assert transfer_manager.upload_file(filename=source, file_id=destination)
+    assert destination.read_text() == 'Q2\n'
+
+
+def test_upload_repeated_when_destination_removed(tmp_path):
+    source = tmp_path / "source.txt"
+    destination = tmp_path / "destination.txt"
+    source.write_text('test question\n')
+    transfer_manager = LocalTransferManager()
+
+    transfer_manager.upload_file(filename=source, file_id=destination)
+    destination.unlink()
+    assert transfer_manager.upload_file(filename=source, file_id=destination)
+    assert destination.exists()
@@ -0,0 +1,44 @@
+from ..definitions import Entry
+from ..__main__ import push_entries, NEAR_DUPLICATE_TAG
+
+
+class FakeAnkiConnect:
+    def __init__(self, note_id):
+        self.note_id = note_id
+        self.added = []
+
+    def add_note(self, entry, deck='Web Development'):
+        self.added.append((entry, deck))
+        return self.note_id
+
+
+def test_rejected_note_not_indexed(question_index):
+    entry = Entry(question='test question', answer='test answer', tags=[])
+    push_entries(FakeAnkiConnect(note_id=None), [entry], question_index)
+    assert len(question_index) == 0
+
+    anki_connect = FakeAnkiConnect(note_id=1)
+    push_entries(anki_connect, [entry], question_index)
+    assert anki_connect.added == [(entry, 'Web Development')]
+    assert len(question_index) == 1
+
+
+def test_near_duplicate_tagged(question_index):
+    anki_connect = FakeAnkiConnect(note_id=1)
+    push_entries(anki_connect, [
+        Entry(question='What special python method implements addition?', answer='__add__', tags=[]),
+        Entry(question='What special Python method implements addition ?', answer='__add__', tags=['#python']),
+        Entry(question='unanswered question', answer=None, tags=[]),
+    ], question_index)
+    assert [entry.tags for entry, _ in anki_connect.added] == [[], ['#python', NEAR_DUPLICATE_TAG]]
+
+
+def test_one_word_change_not_dropped(question_index):
+    question = 'When configuring a Django project for production deployment behind nginx, which setting must be set to {}?'
+    anki_connect = FakeAnkiConnect(note_id=1)
+    push_entries(anki_connect, [
+        Entry(question=question.format('False'), answer='DEBUG', tags=[]),
+        Entry(question=question.format('True'), answer='SESSION_COOKIE_SECURE', tags=[]),
+    ], question_index)
+    assert [entry.answer for entry, _ in anki_connect.added] == ['DEBUG', 'SESSION_COOKIE_SECURE']
+    assert anki_connect.added[1][0].tags == [NEAR_DUPLICATE_TAG]
@@ -0,0 +1,38 @@
+from .. import similarity
+from ..similarity import QuestionIndex, deck_index_file
+
+
+def test_finds_near_duplicate(question_index):
+    question_index.add('What special python method implements addition?')
+    duplicates = question_index.find_duplicates('What special Python method implements addition ?')
+    assert duplicates == ['What special python method implements addition?']
+
+
+def test_ignores_html_markup(question_index):
+    question_index.add('<span>Who wrote Code Complete?</span>')
+    assert len(question_index.find_duplicates('Who wrote Code Complete?')) == 1
+
+
+def test_distinct_question_not_duplicate(question_index):
+    question_index.add('What special python method implements addition?')
+    assert question_index.find_duplicates('How do google test suites get compiled and run?') == []
+
+
+def test_save_and_load(question_index, tmp_path):
+    question_index.add('What special python method implements addition?')
+    question_index.save()
+
+    loaded_index = QuestionIndex.load(tmp_path / 'question_index.json')
+    assert len(loaded_index) == 1
+    assert len(loaded_index.find_duplicates('What special python method implements addition?')) == 1
+
+
+def test_decks_indexed_separately(tmp_path, monkeypatch):
+    monkeypatch.setattr(similarity, 'base_dir', tmp_path)
+    first_index = QuestionIndex.for_deck('First')
+    first_index.add('What special python method implements addition?')
+    first_index.save()
+
+    assert deck_index_file('First') != deck_index_file('Second')
+    assert len(QuestionIndex.for_deck('First')) == 1
+    assert QuestionIndex.for_deck('Second').find_duplicates('What special python method implements addition?') == []
@@ -0,0 +1,53 @@
+import io
+import json
+import sqlite3
+import zipfile
+import os.path
+
+from ..stream import dump_entries, load_entries
+from ..definitions import Entry
+from ..__main__ import cli
+
+
+def test_round_trip():
+    entries = [
+        Entry(question='test question', answer='test answer', tags=['#book']),
+        Entry(question='unanswered “question”', answer=None, tags=[]),
+    ]
+    stream = io.StringIO()
+    dump_entries(entries, stream)
+    stream.seek(0)
+    assert list(load_entries(stream)) == entries
+
+
+def test_load_skips_blank_lines():
+    stream = io.StringIO('{"question": "test question", "answer": null, "tags": []}\n\n')
+    assert list(load_entries(stream)) == [Entry(question='test question', answer=None, tags=[])]
+
+
+def test_parse_then_write(tmp_path, capsys):
+    input_filename = os.path.join(os.path.dirname(__file__), 'data', 'simple_questions.txt')
+    cli(['parse', input_filename])
+    parsed = capsys.readouterr().out
+    assert len(parsed.splitlines()) == 3
+
+    parsed_filename = tmp_path / 'entries.jsonl'
+    parsed_filename.write_text(parsed)
+    output_filename = tmp_path / 'unanswered.txt'
+    cli(['write', str(output_filename), str(parsed_filename), '--unanswered'])
+    assert output_filename.read_text() == 'This line contains nothing. #pragma\n'
+
+
+def test_write_apkg_to_deck(tmp_path):
+    parsed_filename = tmp_path / 'entries.jsonl'
+    parsed_filename.write_text('{"question": "test question", "answer": "test answer", "tags": []}\n')
+    output_filename = tmp_path / 'answered.apkg'
+    cli(['write', str(output_filename), str(parsed_filename), '--deck', 'Other'])
+
+    with zipfile.ZipFile(output_filename) as package:
+        package.extract('collection.anki2', tmp_path)
+    connection = sqlite3.connect(tmp_path / 'collection.anki2')
+    decks = json.loads(connection.execute('SELECT decks FROM col').fetchone()[0])
+    deck_id = connection.execute('SELECT did FROM cards').fetchone()[0]
+    connection.close()
+    assert decks[str(deck_id)]['name'] == 'Other'
@@ -1,3 +1,10 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import zipfile
 from pathlib import Path
 
 from bs4 import BeautifulSoup, Tag
@@ -5,6 +12,9 @@ import typing
 from abc import ABC
 from typing import TextIO
 from ankilol.definitions import Entry, HTML_ANSWER_OUTER_TAG, HTML_ANSWER_INNER_TAG
+from ankilol.apkg import (
+    APKG_COLLECTION_NAME, APKG_MEDIA_NAME, create_collection, insert_entries, referenced_media
+)
 
 
 class GenericWriter(ABC):
@@ -82,10 +92,68 @@ class TextWriter(GenericWriter):
             file.write('* ' + entry.answer + '\n')
 
 
+class ApkgWriter(GenericWriter):
+    """
+    Writes answered entries straight into an Anki package, without going through AnkiConnect or a running Anki.
+    """
+    def __init__(
+            self,
+            filename: str | Path,
+            deck: str = 'Web Development',
+            media_files: list[str | Path] | None = None,
+            media_dir: str | Path = '.',
+    ):
+        self.filename = filename
+        self.deck = deck
+        self.media_files = list(media_files or [])
+        self.media_dir = media_dir
+
+    def write(self, entries):
+        answered_entries = [entry for entry in entries if entry.answer is not None]
+        timestamp = int(time.time() * 1000)
+
+        with tempfile.TemporaryDirectory() as directory:
+            collection_filename = os.path.join(directory, APKG_COLLECTION_NAME)
+            connection = sqlite3.connect(collection_filename)
+            try:
+                with connection:
+                    deck_id, model_id = create_collection(connection, self.deck, timestamp)
+                    insert_entries(connection, answered_entries, self.deck, deck_id, model_id, timestamp)
+            finally:
+                connection.close()
+
+            with zipfile.ZipFile(self.filename, 'w', zipfile.ZIP_DEFLATED) as package:
+                package.write(collection_filename, APKG_COLLECTION_NAME)
+                media = {}
+                for index, media_file in enumerate(self._media_files(answered_entries)):
+                    package.write(media_file, str(index))
+                    media[str(index)] = os.path.basename(media_file)
+                package.writestr(APKG_MEDIA_NAME, json.dumps(media))
+
+    def _media_files(self, entries: list[Entry]) -> list[str | Path]:
+        """
+        Combine the explicitly given media files with images the entries reference, looked up in media_dir.
+        """
+        media_files = list(self.media_files)
+        names = {os.path.basename(media_file) for media_file in media_files}
+        for name in referenced_media(entries):
+            if name in names:
+                continue
+            media_file = os.path.join(self.media_dir, name)
+            if not os.path.exists(media_file):
+                logging.warning(f'Skipping media {name}, not found in {self.media_dir}')
+                continue
+            media_files.append(media_file)
+            names.add(name)
+        return media_files
+
+
 def get_writer_class(filename: str | Path) -> typing.Type[GenericWriter]:
     if '.html' in filename:
         return HTMLWriter
     elif '.txt' in filename:
         return TextWriter
+    elif '.apkg' in filename:
+        return ApkgWriter
     else:
-        raise NotImplementedError('Only supported file extensions are .txt and .html')
+        raise NotImplementedError('Only supported file extensions are .txt, .html and .apkg')